@@ -0,0 +1,178 @@
+"""
+Post-processing of the canal simulation logs: combines the per-scenario logs,
+computes the per-scenario ship statistics and writes the CSV files read by the View.
+
+Together with the controller's --simulate driver this splits a run in two steps,
+so the simulation itself can run under PyPy while pandas stays on CPython:
+
+    pypy3 -m src.Controller.controller --simulate
+    python -m src.Controller.aggregate
+"""
+
+import glob
+import json
+import os
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+import pyarrow as pa
+import pyarrow.csv as pcsv
+import pyarrow.parquet as pq
+
+# Column order of the exported ship log.
+SHIP_LOG_CSV_COLUMNS = [
+    "Ship", "Arrival", "Entry", "Wait Time", "Service Time", "Exit", "Fee", "Cargo Value",
+    "Cargo Weight", "Cargo Space", "Free Weight", "Free Space", "Scenario",
+]
+
+OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "View")
+RAW_LOG_DIR = os.path.join(OUTPUT_DIR, "raw_logs")
+
+# File format of the exported logs: "csv" (also read by analisis.ipynb) or "parquet"
+# (zstd-compressed columnar files, much smaller and faster to read back in the View).
+OUTPUT_FORMAT = "csv"
+
+
+def add_scenario_column(df, scenario_name):
+    """
+    Tag every row of a per-scenario log with its scenario, as a one-category categorical:
+    one small code per row instead of a reference to the name string.
+    """
+    df["Scenario"] = pd.Categorical.from_codes(np.zeros(len(df), np.int8), categories=[scenario_name])
+
+
+def _unify_scenarios(logs):
+    """
+    Give the Scenario columns of all logs the same categories (in scenario order), so
+    pd.concat keeps the column categorical instead of falling back to strings.
+    """
+    categories = union_categoricals([df["Scenario"] for df in logs]).categories
+    for df in logs:
+        df["Scenario"] = df["Scenario"].cat.set_categories(categories)
+
+
+def concat_logs(master_ship_logs, master_cargo_logs, master_canal_logs):
+    """
+    Concatenate the per-scenario ship, cargo and canal DataFrames.
+    """
+    for logs in (master_ship_logs, master_cargo_logs, master_canal_logs):
+        _unify_scenarios(logs)
+    final_ships_df = pd.concat(master_ship_logs, ignore_index=True)
+    final_cargos_df = pd.concat(master_cargo_logs, ignore_index=True)
+    final_canal_df = pd.concat(master_canal_logs, ignore_index=True)
+    return final_ships_df, final_cargos_df, final_canal_df
+
+
+def add_derived_ship_columns(final_ships_df, base_fee):
+    """
+    Compute the ship log columns derivable from the raw logged fields, as whole-column
+    operations on the final DataFrame, and return it in the exported column order.
+    """
+    final_ships_df["Wait Time"] = final_ships_df["Entry"] - final_ships_df["Arrival"]
+    final_ships_df["Exit"] = final_ships_df["Entry"] + final_ships_df["Service Time"]
+    final_ships_df["Fee"] = base_fee / (1 + final_ships_df["Wait Time"])
+    final_ships_df["Free Weight"] = final_ships_df["Max Weight"] - final_ships_df["Cargo Weight"]
+    final_ships_df["Free Space"] = final_ships_df["Max Space"] - final_ships_df["Cargo Space"]
+    return final_ships_df[SHIP_LOG_CSV_COLUMNS]
+
+
+def ship_statistics(final_ships_df):
+    """
+    Aggregated ship statistics per scenario.
+    """
+    # Every aggregation is a built-in (Cython) reduction; the wait time quartiles come
+    # from a single groupby quantile call instead of per-group Python lambdas.
+    grouped = final_ships_df.groupby("Scenario", observed=True)
+    ship_stats = grouped.agg(
+        Total_Ships=('Ship', 'count'),
+        Min_Wait_Time=('Wait Time', 'min'),
+        Median_Wait_Time=('Wait Time', 'median'),
+        Max_Wait_Time=('Wait Time', 'max'),
+        Avg_Wait_Time=('Wait Time', 'mean'),
+        Min_Service_Time=('Service Time', 'min'),
+        Median_Service_Time=('Service Time', 'median'),
+        Max_Service_Time=('Service Time', 'max'),
+        Avg_Service_Time=('Service Time', 'mean'),
+        Min_Fee=('Fee', 'min'),
+        Median_Fee=('Fee', 'median'),
+        Max_Fee=('Fee', 'max'),
+        Avg_Fee=('Fee', 'mean'),
+        Total_Fees=('Fee', 'sum'),
+        Avg_Cargo_Value=('Cargo Value', 'mean'),
+        Min_Cargo_Value=('Cargo Value', 'min'),
+        Max_Cargo_Value=('Cargo Value', 'max')
+    )
+    quartiles = grouped['Wait Time'].quantile([0.25, 0.75]).unstack()
+    ship_stats.insert(ship_stats.columns.get_loc('Median_Wait_Time'), 'Q1_Wait_Time', quartiles[0.25])
+    ship_stats.insert(ship_stats.columns.get_loc('Median_Wait_Time') + 1, 'Q3_Wait_Time', quartiles[0.75])
+    return ship_stats.reset_index()
+
+
+def load_raw_logs(raw_dir=RAW_LOG_DIR):
+    """
+    Load the JSON raw logs written by the controller's --simulate driver.
+    Returns the combined ship, cargo and canal DataFrames and the cargo catalog.
+    """
+    master_ship_logs = []
+    master_cargo_logs = []
+    master_canal_logs = []
+    # File names carry the zero-padded scenario index, so sorting keeps scenario order.
+    for path in sorted(glob.glob(os.path.join(raw_dir, "scenario_*.json"))):
+        with open(path) as f:
+            raw_logs = json.load(f)
+        df_ships = pd.DataFrame(raw_logs["Ships"])
+        df_cargos = pd.DataFrame(raw_logs["Cargos"])
+        df_canal = pd.DataFrame(raw_logs["Canal"])
+        for df in (df_ships, df_cargos, df_canal):
+            add_scenario_column(df, raw_logs["Scenario"])
+        master_ship_logs.append(df_ships)
+        master_cargo_logs.append(df_cargos)
+        master_canal_logs.append(df_canal)
+    with open(os.path.join(raw_dir, "cargo_catalog.json")) as f:
+        cargo_catalog_df = pd.DataFrame(json.load(f))
+    return (*concat_logs(master_ship_logs, master_cargo_logs, master_canal_logs), cargo_catalog_df)
+
+
+# --- Export ---
+def write_csv(df, path):
+    """
+    Write a DataFrame to CSV with PyArrow's multithreaded C++ writer,
+    which is much faster than DataFrame.to_csv on the large logs.
+    """
+    pcsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path)
+
+
+def write_parquet(df, path):
+    """
+    Write a DataFrame to a zstd-compressed Parquet file.
+    """
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, compression="zstd")
+
+
+def write_logs(logs, output_dir=OUTPUT_DIR, suffix=""):
+    """
+    Write each DataFrame of logs (a dict of file name -> DataFrame) to output_dir
+    as <name><suffix>.csv or <name><suffix>.parquet, depending on OUTPUT_FORMAT.
+    """
+    writer = write_parquet if OUTPUT_FORMAT == "parquet" else write_csv
+    os.makedirs(output_dir, exist_ok=True)
+    for name, df in logs.items():
+        writer(df, os.path.join(output_dir, f"{name}{suffix}.{OUTPUT_FORMAT}"))
+
+
+if __name__ == "__main__":
+    from src.Controller.controller import BASE_FEE
+
+    final_ships_df, final_cargos_df, final_canal_df, cargo_catalog_df = load_raw_logs()
+    final_ships_df = add_derived_ship_columns(final_ships_df, BASE_FEE)
+    ship_stats = ship_statistics(final_ships_df)
+
+    write_logs({
+        "ship_log": final_ships_df,
+        "cargo_log": final_cargos_df,
+        "canal_log": final_canal_df,
+        "ship_stats": ship_stats,
+        "cargo_catalog": cargo_catalog_df,
+    })
+
+    print(f"{OUTPUT_FORMAT.upper()} files have been generated in the View folder.")
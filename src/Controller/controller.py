@@ -38,176 +38,452 @@
 
 
 
-import simpy
+import heapq
+import collections
 import random
-import statistics
-import pandas as pd
+import numpy as np
 import itertools
-import contextlib
+import glob
+import json
 import os
+import sys
 import time
-from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from multiprocessing import shared_memory
+from joblib import Memory
 
 
 
-from src.Model.boat import Boat
-from src.Model.cargo import Cargo
-from src.Model.cargo_optimizer import load_optimal_cargo
+from src.Controller.utils import random_boats, random_cargo
+from src.Model import cargo_optimizer
+from src.Model.cargo_optimizer import load_optimal_cargo, cargo_arrays, set_cargo_arrays
 
 # Toggle for using the cargo optimization algorithm.
 # Set to True to use optimization, or False to load cargo in a default (non-optimized) way.
 USE_OPTIMIZATION = False
 
-# --- Utility Functions for Random Generation ---
-
-def random_boat():
+# Toggle for the on-disk cache of run_simulation results (see cached_simulation).
+# Set to False to always re-run the simulations, e.g. after changing the simulation code.
+USE_SIM_CACHE = True
+# Part of the cache key: bump it whenever a change alters what run_simulation returns
+# (simulation results or log columns), so stale cached results are not served.
+SIM_CACHE_VERSION = 3
+
+# pandas is only imported where DataFrames are built (see src.Controller.aggregate), so the
+# --simulate driver can run under PyPy and leave the aggregation to a CPython process.
+OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "View")
+RAW_LOG_DIR = os.path.join(OUTPUT_DIR, "raw_logs")
+SIM_CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", ".sim_cache")
+
+# Maximum number of cargo log rows kept per scenario and cargo option, as a uniform
+# random sample (see ReservoirLog). None keeps every row.
+CARGO_SAMPLE_SIZE = None
+
+# Seed for the cargo options of a sweep, so re-runs use the same cargo and can hit the cache.
+CARGO_SEED = 7
+
+# Columns of the canal log, whose rows are plain tuples in this order.
+CANAL_LOG_COLUMNS = ("Total Ships", "Average Wait Time", "Total Fees Collected", "Simulation Time")
+
+# Fee charged to a ship that does not wait; it decreases as 1 / (1 + wait time).
+BASE_FEE = 1000
+
+# --- Columnar Log ---
+# Column names and dtypes of the per-ship and per-cargo logs.
+# Only raw fields are logged per ship; Wait Time, Exit, Fee, Free Weight and Free Space are
+# derived from them once on the final DataFrame (see aggregate.add_derived_ship_columns).
+SHIP_LOG_COLUMNS = {
+    "Ship": object,
+    "Arrival": np.float64,
+    "Entry": np.float64,
+    "Service Time": np.float64,
+    "Cargo Value": np.float64,
+    "Cargo Weight": np.int64,
+    "Cargo Space": np.int64,
+    "Max Weight": np.int64,
+    "Max Space": np.int64,
+}
+# The cargo log only pairs ships with the cargo they carry, by the cargo's index in the cargo
+# options; the static cargo fields are written once to the cargo catalog (see cargo_catalog)
+# and joined on "Cargo ID". Cargo names are random and not guaranteed unique, so they are no key.
+CARGO_LOG_COLUMNS = {
+    "Ship": object,
+    "Cargo ID": np.int64,
+}
+
+class ColumnLog:
     """
-    Create a Boat with randomized max_weight and max_space using an exponential distribution.
-    Mean weight capacity is ~10000 units and mean space capacity is ~500 units.
-    @author: nombre
+    Log stored as one pre-allocated NumPy array per column (structure of arrays).
+    Rows are written by index; the arrays grow geometrically when full.
     """
-    max_weight = max(1000, int(random.expovariate(1 / 10000)))  # ensuring a minimum capacity
-    max_space = max(100, int(random.expovariate(1 / 500)))       # ensuring a minimum capacity
-    name = "Boat_" + str(random.randint(1, 1000))
-    return Boat(name, max_weight, max_space)
-
-def random_cargo():
+    def __init__(self, columns, capacity=1024):
+        self.arrays = {name: np.empty(capacity, dtype) for name, dtype in columns.items()}
+        self.capacity = capacity
+        self.size = 0
+
+    def _grow(self, capacity):
+        for name, array in self.arrays.items():
+            self.arrays[name] = np.resize(array, capacity)
+        self.capacity = capacity
+
+    def reserve(self, capacity):
+        if capacity > self.capacity:
+            self._grow(capacity)
+
+    def append(self, *values):
+        """Write one row; values are given in column order."""
+        if self.size == self.capacity:
+            self._grow(2 * self.capacity)
+        for array, value in zip(self.arrays.values(), values):
+            array[self.size] = value
+        self.size += 1
+
+    def extend(self, count, *columns):
+        """Write count rows at once; each column is a sequence of count values, or a single value for all rows."""
+        end = self.size + count
+        if end > self.capacity:
+            self._grow(max(end, 2 * self.capacity))
+        for array, values in zip(self.arrays.values(), columns):
+            array[self.size:end] = values
+        self.size = end
+
+    def to_frame(self):
+        import pandas as pd
+        return pd.DataFrame({name: array[:self.size] for name, array in self.arrays.items()})
+
+    def to_lists(self):
+        """Columns as plain Python lists, for the JSON raw logs."""
+        return {name: array[:self.size].tolist() for name, array in self.arrays.items()}
+
+class ReservoirLog(ColumnLog):
     """
-    Create a Cargo with randomized weight, space_required, and value_per_unit using an exponential distribution.
-    Mean weight ~2000 units, mean space ~150 units, mean value ~100.
+    ColumnLog that keeps a uniform random sample of at most sample_size rows per value of
+    its key column (reservoir sampling, Algorithm R), so its size stays bounded however
+    long the simulation runs.
     """
-    weight = max(100, int(random.expovariate(1 / 2000)))         # ensure non-zero weight
-    space_required = max(50, int(random.expovariate(1 / 150)))    # ensure non-zero space requirement
-    value_per_unit = max(10, random.expovariate(1 / 100))         # ensure non-zero value per unit
-    name = "Cargo_" + str(random.randint(1, 1000))
-    category = random.choice(["Container", "Bulk", "Liquid", "Refrigerated", "Luxury"])
-    return Cargo(name, value_per_unit, weight, space_required, category)
+    def __init__(self, columns, key, sample_size, rng):
+        super().__init__(columns, capacity=sample_size)
+        self.key_index = list(columns).index(key)
+        self.sample_size = sample_size
+        self.rng = rng
+        self.seen = collections.Counter()          # rows offered so far, per key
+        self.rows = collections.defaultdict(list)  # positions of the sampled rows, per key
+
+    def reserve(self, capacity):
+        """The sample never needs more rows than it keeps, so there is nothing to reserve."""
+
+    def append(self, *values):
+        key = values[self.key_index]
+        self.seen[key] += 1
+        rows = self.rows[key]
+        if len(rows) < self.sample_size:
+            rows.append(self.size)
+            super().append(*values)
+            return
+        # Replace a sampled row with probability sample_size / rows seen.
+        j = int(self.rng.integers(self.seen[key]))
+        if j < self.sample_size:
+            for array, value in zip(self.arrays.values(), values):
+                array[rows[j]] = value
+
+    def extend(self, count, *columns):
+        columns = [np.broadcast_to(np.asarray(column, dtype=array.dtype), (count,))
+                   for column, array in zip(columns, self.arrays.values())]
+        for row in zip(*columns):
+            self.append(*row)
 
 # --- Canal Simulation Class ---
+def lock_entries(arrivals, services, num_locks):
+    """
+    Entry times of ships served in arrival order (FIFO) by num_locks identical locks.
+
+    Each ship enters at its arrival or when the earliest lock is released, whichever is later,
+    so a heap of the locks' release times replaces a full event loop. With a single lock the
+    waits follow the Lindley recurrence W[i] = max(0, W[i-1] + S[i-1] - (A[i] - A[i-1])), whose
+    closed form W = P - cummin(P), with P the running sum of S[i-1] - (A[i] - A[i-1]), takes a
+    few NumPy passes instead.
+    """
+    if num_locks == 1:
+        partial = np.concatenate(([0.0], np.cumsum(services[:-1] - np.diff(arrivals))))
+        return arrivals + (partial - np.minimum.accumulate(partial))
+    releases = [0.0] * num_locks  # every lock is free at the start
+    heapreplace = heapq.heapreplace
+    entries = []
+    for arrival, service in zip(arrivals.tolist(), services.tolist()):
+        entry = max(arrival, releases[0])
+        heapreplace(releases, entry + service)
+        entries.append(entry)
+    return np.array(entries, np.float64)
+
 class CanalSimulation:
-    def __init__(self, env, num_locks, avg_service_time, base_fee=1000):
-        self.env = env
-        self.lock = simpy.Resource(env, capacity=num_locks)
+    def __init__(self, num_locks, avg_service_time, base_fee=BASE_FEE, rng=None, cargo_sample_size=None,
+                 cargo_arrays=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.num_locks = num_locks
         self.avg_service_time = avg_service_time  # average service time in the canal
         self.base_fee = base_fee                  # base fee when no waiting occurs
-        self.ship_logs = []                       # log for ship events
-        self.cargo_logs = []                      # log for cargo details (per ship)
+        self.ship_log = ColumnLog(SHIP_LOG_COLUMNS)    # log for ship events
+        if cargo_sample_size is None:
+            self.cargo_log = ColumnLog(CARGO_LOG_COLUMNS)  # log for cargo details (per ship)
+        else:
+            # Bounded sample of the cargo log, per cargo option.
+            self.cargo_log = ReservoirLog(CARGO_LOG_COLUMNS, "Cargo ID", cargo_sample_size, self.rng)
         self.canal_logs = []                      # log for overall canal stats
         self.total_fees_collected = 0
         self.ship_count = 0
-        self.wait_times = []                      # for computing average wait time
+        self.wait_times = np.empty(0)             # waits of the ships that entered, for the average
+        self.cargo_arrays = cargo_arrays          # (weights, spaces, values) of the cargo options
 
-    def process_ship_with_cargo(self, ship, cargo_options):
+    def load_ship(self, ship, cargo_options):
         """
-        Process a ship:
-          - The ship arrives.
-          - Its cargo is loaded (using optimization if toggled on).
-          - It requests access to the canal locks.
-          - Once granted, wait time is measured and a fee is computed.
-          - The ship undergoes service before exiting.
-          - All events are logged.
+        Load the ship's cargo (using optimization if toggled on) and return the
+        indices of the loaded cargo options.
         """
-        arrival_time = self.env.now
-
         if USE_OPTIMIZATION:
-            with contextlib.redirect_stdout(None):
-                load_optimal_cargo(ship, cargo_options)
-        else:
-            # Default loading: iterate through cargo_options and load if the ship can load it.
-            for cargo in cargo_options:
-                if ship.can_load(cargo):
-                    ship.load_cargo(cargo)
-
-        with self.lock.request() as request:
-            yield request
-            entry_time = self.env.now
-            wait_time = entry_time - arrival_time
-            self.wait_times.append(wait_time)
-            fee = self.base_fee / (1 + wait_time)
-            self.total_fees_collected += fee
-
-            service_time = random.expovariate(1.0 / self.avg_service_time)
-            yield self.env.timeout(service_time)
-            exit_time = self.env.now
-
-            cargo_value = sum(c.value_per_unit * c.weight for c in ship.cargo_list)
-            self.ship_logs.append({
-                "Ship": ship.name,
-                "Arrival": arrival_time,
-                "Entry": entry_time,
-                "Wait Time": wait_time,
-                "Service Time": service_time,
-                "Exit": exit_time,
-                "Fee": fee,
-                "Cargo Value": cargo_value,
-                "Cargo Weight": ship.current_weight,
-                "Cargo Space": ship.current_space,
-                "Free Weight": ship.max_weight - ship.current_weight,
-                "Free Space": ship.max_space - ship.current_space
-            })
-            for cargo in ship.cargo_list:
-                self.cargo_logs.append({
-                    "Ship": ship.name,
-                    "Cargo": cargo.name,
-                    "Category": cargo.category,
-                    "Weight": cargo.weight,
-                    "Space": cargo.space_required,
-                    "Value": cargo.value_per_unit * cargo.weight
-                })
-            self.ship_count += 1
+            return load_optimal_cargo(ship, cargo_options, self.cargo_arrays)
+        # Default loading: iterate through cargo_options and load if the ship can load it.
+        cargo_idx = []
+        for i, cargo in enumerate(cargo_options):
+            if ship.load_cargo(cargo):
+                cargo_idx.append(i)
+        return np.array(cargo_idx, np.int64)
+
+    def run_locks(self, until, arrivals, services, boats, cargo_options):
+        """
+        Serve the ships through the locks (M/M/c with FIFO order) and log them.
+        Entry times come from lock_entries; a fee is charged to every ship that entered
+        before the end of the simulation, and every ship that left by then is logged,
+        in the order they left the canal.
+        """
+        entries = lock_entries(arrivals, services, self.num_locks)
+        waits = entries - arrivals
+        exits = entries + services
+        fees = self.base_fee / (1 + waits)
+
+        # Ships enter in arrival order, so the ones that entered before the end are a prefix.
+        n_entered = int(np.count_nonzero(entries < until))
+        self.wait_times = waits[:n_entered]
+        self.total_fees_collected = float(fees[:n_entered].sum())
+        # With several locks ships can overtake each other inside the canal: sort by exit.
+        done = np.flatnonzero(exits < until)
+        done = done[np.argsort(exits[done], kind="stable")]
+        n_done = len(done)
+        self.ship_count = n_done
+
+        # Only ships that leave the canal are logged, so only they need their cargo loaded.
+        done_boats = [boats[i] for i in done.tolist()]
+        loaded = [self.load_ship(boat, cargo_options) for boat in done_boats]
+        cargo_idx = np.concatenate(loaded) if loaded else np.empty(0, np.int64)
+        cargo_counts = np.array([len(idx) for idx in loaded], np.int64)
+
+        names = np.array([boat.name for boat in done_boats], dtype=object)
+        ship_values = np.array([boat.total_value for boat in done_boats], np.float64)
+        current_weights = np.array([boat.current_weight for boat in done_boats], np.int64)
+        current_spaces = np.array([boat.current_space for boat in done_boats], np.int64)
+        max_weights = np.array([boat.max_weight for boat in done_boats], np.int64)
+        max_spaces = np.array([boat.max_space for boat in done_boats], np.int64)
+        self.ship_log.extend(
+            n_done, names, arrivals[done], entries[done], services[done], ship_values,
+            current_weights, current_spaces, max_weights, max_spaces
+        )
+        self.cargo_log.extend(len(cargo_idx), np.repeat(names, cargo_counts), cargo_idx)
 
     def run(self, until, arrival_rate, cargo_options):
         """
-        Starts the ship arrivals process and runs the simulation until the given time.
+        Draws every ship arrival up front (they do not depend on the canal state) and
+        serves the ships with run_locks until the given time.
+        Interarrival times, service times and boats are all drawn in bulk from self.rng.
         """
-        def ship_arrivals(env, arrival_rate, canal_sim, cargo_options):
-            while True:
-                interarrival = random.expovariate(arrival_rate)
-                yield env.timeout(interarrival)
-                ship = random_boat()
-                env.process(canal_sim.process_ship_with_cargo(ship, cargo_options))
-
-        self.env.process(ship_arrivals(self.env, arrival_rate, self, cargo_options))
-        self.env.run(until=until)
-        average_wait = statistics.mean(self.wait_times) if self.wait_times else 0
-        self.canal_logs.append({
-            "Total Ships": self.ship_count,
-            "Average Wait Time": average_wait,
-            "Total Fees Collected": self.total_fees_collected,
-            "Simulation Time": until
-        })
-
-# --- Simulation Runner Function ---
-def run_simulation(simulation_time, arrival_rate, avg_service_time, num_locks, cargo_options):
-    random.seed(42)  # For reproducibility
-    env = simpy.Environment()
-    canal_sim = CanalSimulation(env, num_locks, avg_service_time)
+        # Draw ~50% more interarrivals than the expected ship count, topping up in the rare
+        # case they still fall short of the simulation time.
+        batch = int(arrival_rate * until * 1.5) + 1
+        arrivals = np.cumsum(self.rng.exponential(1 / arrival_rate, batch))
+        while arrivals[-1] < until:
+            arrivals = np.concatenate((arrivals, arrivals[-1] + np.cumsum(self.rng.exponential(1 / arrival_rate, batch))))
+        arrivals = arrivals[arrivals < until]
+
+        n_ships = len(arrivals)
+        if self.cargo_arrays is None:
+            self.cargo_arrays = cargo_arrays(cargo_options)
+        self.ship_log.reserve(n_ships)
+        self.cargo_log.reserve(n_ships * 4)  # a few cargo items per ship; grows if exceeded
+        services = self.rng.exponential(self.avg_service_time, n_ships)
+        boats = random_boats(self.rng, n_ships)
+
+        self.run_locks(until, arrivals, services, boats, cargo_options)
+
+        average_wait = float(self.wait_times.mean()) if self.wait_times.size else 0
+        self.canal_logs.append((self.ship_count, average_wait, self.total_fees_collected, until))
+
+# --- Simulation Runner Functions ---
+def run_canal(simulation_time, arrival_rate, avg_service_time, num_locks, cargo_options, seed=42):
+    """
+    Runs one canal simulation and returns the CanalSimulation holding its logs.
+    The seed makes the run reproducible (every draw comes from the NumPy Generator it
+    seeds); the sweep gives every scenario its own.
+    """
+    # The cargo options are fixed for the whole run: convert them to arrays once, up front.
+    canal_sim = CanalSimulation(num_locks, avg_service_time, base_fee=BASE_FEE, rng=np.random.default_rng(seed),
+                                cargo_sample_size=CARGO_SAMPLE_SIZE,
+                                cargo_arrays=cargo_arrays(cargo_options))
     canal_sim.run(until=simulation_time, arrival_rate=arrival_rate, cargo_options=cargo_options)
-    df_ships = pd.DataFrame(canal_sim.ship_logs)
-    df_cargos = pd.DataFrame(canal_sim.cargo_logs)
-    df_canal = pd.DataFrame(canal_sim.canal_logs)
+    return canal_sim
+
+def run_simulation(simulation_time, arrival_rate, avg_service_time, num_locks, cargo_options, seed=42):
+    import pandas as pd
+    canal_sim = run_canal(simulation_time, arrival_rate, avg_service_time, num_locks, cargo_options, seed)
+    df_ships = canal_sim.ship_log.to_frame()
+    df_cargos = canal_sim.cargo_log.to_frame()
+    df_canal = pd.DataFrame.from_records(canal_sim.canal_logs, columns=CANAL_LOG_COLUMNS)
     return df_ships, df_cargos, df_canal
 
+def cargo_fingerprint(cargo_options):
+    """
+    Hashable description of the cargo options by value, used as their cache key.
+    """
+    return tuple((cargo.name, cargo.weight, cargo.space_required, cargo.value_per_unit, cargo.category)
+                 for cargo in cargo_options)
+
+_memory = Memory(SIM_CACHE_DIR, verbose=0)
+
+@_memory.cache(ignore=["cargo_options"])
+def _cached_simulation(simulation_time, arrival_rate, avg_service_time, num_locks, cargo_options, seed,
+                       cargo_key, use_optimization, cargo_sample_size, weight_bucket, space_bucket,
+                       base_fee, cache_version):
+    return run_simulation(simulation_time, arrival_rate, avg_service_time, num_locks, cargo_options, seed)
+
+def cached_simulation(simulation_time, arrival_rate, avg_service_time, num_locks, cargo_options, seed=42):
+    """
+    run_simulation with its three DataFrames memoized on disk in SIM_CACHE_DIR.
+    The simulation is deterministic, so results are keyed by the parameters (seed included), the cargo
+    options (by value), USE_OPTIMIZATION, CARGO_SAMPLE_SIZE, BASE_FEE (the canal log's fee total) and
+    the optimizer's WEIGHT_BUCKET and SPACE_BUCKET, which change the optimized loads. Changes to the simulation code itself are
+    not detected: bump SIM_CACHE_VERSION with any change to the results or the log schema.
+    """
+    if not USE_SIM_CACHE:
+        return run_simulation(simulation_time, arrival_rate, avg_service_time, num_locks, cargo_options, seed)
+    return _cached_simulation(simulation_time, arrival_rate, avg_service_time, num_locks, cargo_options, seed,
+                              cargo_fingerprint(cargo_options), USE_OPTIMIZATION, CARGO_SAMPLE_SIZE,
+                              cargo_optimizer.WEIGHT_BUCKET, cargo_optimizer.SPACE_BUCKET, BASE_FEE,
+                              SIM_CACHE_VERSION)
+
+# --- Worker State (for Concurrency) ---
+# Cargo options shared by every scenario; set once per worker process by _init_worker
+# so the list is not pickled again with each task.
+_WORKER_CARGO = None
+# Shared memory block holding the cargo arrays; kept open for the worker's lifetime.
+_WORKER_SHM = None
+
+def _shared_cargo_views(buf, n):
+    """
+    NumPy views (weights, spaces, values) over a shared memory buffer holding
+    the arrays for n cargo options back to back.
+    """
+    weights = np.ndarray((n,), np.int64, buffer=buf, offset=0)
+    spaces = np.ndarray((n,), np.int64, buffer=buf, offset=8 * n)
+    values = np.ndarray((n,), np.float64, buffer=buf, offset=16 * n)
+    return weights, spaces, values
+
+def _copy_to_shared(buf, arrays):
+    for view, array in zip(_shared_cargo_views(buf, len(arrays[0])), arrays):
+        view[:] = array
+
+def _init_worker(cargo_options, shm_name):
+    global _WORKER_CARGO, _WORKER_SHM
+    _WORKER_CARGO = cargo_options
+    # Attach to the cargo arrays built by the parent instead of converting them again.
+    _WORKER_SHM = shared_memory.SharedMemory(name=shm_name)
+    set_cargo_arrays(cargo_options, _shared_cargo_views(_WORKER_SHM.buf, len(cargo_options)))
+
+def _scenario_seed(arrival_rate, avg_service_time, num_locks, scenario_index):
+    """
+    Seed of one scenario, so the scenarios draw independent random streams instead of
+    all replaying seed 42. Hashes of numbers are not salted per process, so the seed is
+    the same in every worker and on every run.
+    """
+    return hash((arrival_rate, avg_service_time, num_locks, scenario_index)) & 0xffffffff
+
+def _scenario_name(arrival_rate, avg_service_time, num_locks, scenario_index, total_scenarios):
+    return f"Scenario {scenario_index}/{total_scenarios}: AR={arrival_rate}, ST={avg_service_time}, Locks={num_locks}"
+
 # --- Function to Run a Single Scenario (for Concurrency) ---
 def run_single_scenario(params):
     """
     Runs a single simulation scenario given a tuple of parameters.
-    Returns the three DataFrames (with a "Scenario" column added).
+    Cargo options are read from the worker state set up by _init_worker.
+    Returns the scenario index and the three DataFrames (with a "Scenario" column added).
     """
-    arrival_rate, avg_service_time, num_locks, scenario_index, total_scenarios, cargo_options, simulation_time = params
-    scenario_name = f"Scenario {scenario_index}/{total_scenarios}: AR={arrival_rate}, ST={avg_service_time}, Locks={num_locks}"
+    from src.Controller.aggregate import add_scenario_column
+
+    arrival_rate, avg_service_time, num_locks, scenario_index, total_scenarios, simulation_time = params
+    cargo_options = _WORKER_CARGO
+    scenario_name = _scenario_name(arrival_rate, avg_service_time, num_locks, scenario_index, total_scenarios)
     print("=" * 50)
     print(f"Running {scenario_name}")
     print("=" * 50)
-    df_ships, df_cargos, df_canal = run_simulation(simulation_time, arrival_rate, avg_service_time, num_locks, cargo_options)
-    df_ships["Scenario"] = scenario_name
-    df_cargos["Scenario"] = scenario_name
-    df_canal["Scenario"] = scenario_name
+    seed = _scenario_seed(arrival_rate, avg_service_time, num_locks, scenario_index)
+    df_ships, df_cargos, df_canal = cached_simulation(simulation_time, arrival_rate, avg_service_time, num_locks,
+                                                      cargo_options, seed)
+    for df in (df_ships, df_cargos, df_canal):
+        add_scenario_column(df, scenario_name)
     print(f"Finished {scenario_name}\n")
-    return df_ships, df_cargos, df_canal
+    return scenario_index, df_ships, df_cargos, df_canal
 
-# --- Function to Run All Scenarios Concurrently ---
-def run_all_scenarios_concurrent():
+def simulate_single_scenario(params):
+    """
+    Runs a single simulation scenario like run_single_scenario, but writes its raw logs
+    to a JSON file in RAW_LOG_DIR instead of building DataFrames.
+    Returns the scenario index and the path of the written file.
+    """
+    arrival_rate, avg_service_time, num_locks, scenario_index, total_scenarios, simulation_time = params
+    scenario_name = _scenario_name(arrival_rate, avg_service_time, num_locks, scenario_index, total_scenarios)
+    print(f"Running {scenario_name}")
+    seed = _scenario_seed(arrival_rate, avg_service_time, num_locks, scenario_index)
+    canal_sim = run_canal(simulation_time, arrival_rate, avg_service_time, num_locks, _WORKER_CARGO, seed)
+    raw_logs = {
+        "Scenario": scenario_name,
+        "Ships": canal_sim.ship_log.to_lists(),
+        "Cargos": canal_sim.cargo_log.to_lists(),
+        "Canal": [dict(zip(CANAL_LOG_COLUMNS, row)) for row in canal_sim.canal_logs],
+    }
+    path = os.path.join(RAW_LOG_DIR, f"scenario_{scenario_index:03d}.json")
+    with open(path, "w") as f:
+        json.dump(raw_logs, f)
+    return scenario_index, path
+
+# --- Functions to Run All Scenarios Concurrently ---
+def sweep_cargo_options():
+    """
+    The global list of cargo options shared by every scenario (10 random cargo types).
+    Drawn from a private generator seeded with CARGO_SEED, so every call returns the same
+    options and the caller's global random state is left alone.
+    """
+    rng = random.Random(CARGO_SEED)
+    return [random_cargo(rng) for _ in range(10)]
+
+def cargo_catalog(cargo_options):
+    """
+    Columns of the cargo catalog: one row per cargo option with its static fields.
+    The cargo log only records (Ship, Cargo ID) pairs; join it with this table on
+    "Cargo ID" for the cargo details. Plain lists, so the --simulate driver can write
+    them as JSON without pandas.
+    """
+    return {
+        "Cargo ID": list(range(len(cargo_options))),
+        "Cargo": [cargo.name for cargo in cargo_options],
+        "Category": [cargo.category for cargo in cargo_options],
+        "Weight": [cargo.weight for cargo in cargo_options],
+        "Space": [cargo.space_required for cargo in cargo_options],
+        "Value Per Unit": [cargo.value_per_unit for cargo in cargo_options],
+    }
+
+def _run_scenarios(worker):
+    """
+    Runs every scenario of the parameter sweep with the given worker function on a
+    process pool. Returns the cargo options the scenarios were run with and the
+    workers' results in scenario order. Each worker result is a tuple starting with
+    the scenario index.
+    """
     simulation_time = 1000  # Total simulation time
 
     # Define ranges for parameters
@@ -215,8 +491,7 @@ def run_all_scenarios_concurrent():
     avg_service_time_options = [2.5, 5, 7.5, 10]
     num_locks_options = [1, 2, 3, 4, 5]
 
-    # Create a global list of cargo options (10 random cargo types)
-    cargo_options = [random_cargo() for _ in range(10)]
+    cargo_options = sweep_cargo_options()
 
     # Generate scenario combinations using itertools.product
     scenarios = list(itertools.product(arrival_rate_options, avg_service_time_options, num_locks_options))
@@ -225,84 +500,104 @@ def run_all_scenarios_concurrent():
     # Build a list of parameters for each scenario.
     params_list = []
     for idx, (arrival_rate, avg_service_time, num_locks) in enumerate(scenarios, start=1):
-        params_list.append((arrival_rate, avg_service_time, num_locks, idx, total_scenarios, cargo_options, simulation_time))
-
-    master_ship_logs = []
-    master_cargo_logs = []
-    master_canal_logs = []
-
-    # Run all scenarios concurrently.
-    with ProcessPoolExecutor() as executor:
-        results = executor.map(run_single_scenario, params_list)
-        for df_ships, df_cargos, df_canal in results:
-            master_ship_logs.append(df_ships)
-            master_cargo_logs.append(df_cargos)
-            master_canal_logs.append(df_canal)
-
-    final_ships_df = pd.concat(master_ship_logs, ignore_index=True)
-    final_cargos_df = pd.concat(master_cargo_logs, ignore_index=True)
-    final_canal_df = pd.concat(master_canal_logs, ignore_index=True)
-
-    # Aggregated ship statistics per scenario
-    ship_stats = final_ships_df.groupby("Scenario").agg(
-        Total_Ships=('Ship', 'count'),
-        Min_Wait_Time=('Wait Time', 'min'),
-        Q1_Wait_Time=('Wait Time', lambda x: x.quantile(0.25)),
-        Median_Wait_Time=('Wait Time', 'median'),
-        Q3_Wait_Time=('Wait Time', lambda x: x.quantile(0.75)),
-        Max_Wait_Time=('Wait Time', 'max'),
-        Avg_Wait_Time=('Wait Time', 'mean'),
-        Min_Service_Time=('Service Time', 'min'),
-        Median_Service_Time=('Service Time', 'median'),
-        Max_Service_Time=('Service Time', 'max'),
-        Avg_Service_Time=('Service Time', 'mean'),
-        Min_Fee=('Fee', 'min'),
-        Median_Fee=('Fee', 'median'),
-        Max_Fee=('Fee', 'max'),
-        Avg_Fee=('Fee', 'mean'),
-        Total_Fees=('Fee', 'sum'),
-        Avg_Cargo_Value=('Cargo Value', 'mean'),
-        Min_Cargo_Value=('Cargo Value', 'min'),
-        Max_Cargo_Value=('Cargo Value', 'max')
-    ).reset_index()
-
-    return final_ships_df, final_cargos_df, final_canal_df, ship_stats
-
-if __name__ == "__main__":
+        params_list.append((arrival_rate, avg_service_time, num_locks, idx, total_scenarios, simulation_time))
+
+    # Build the cargo arrays once and place them in shared memory for the workers.
+    arrays = cargo_arrays(cargo_options)
+    shm = shared_memory.SharedMemory(create=True, size=sum(array.nbytes for array in arrays))
+    _copy_to_shared(shm.buf, arrays)
+
+    # Run all scenarios concurrently on every core. Results arrive out of order,
+    # so they are put back in scenario order before concatenating.
+    # About four chunks per worker: few enough to amortize the IPC, enough to balance the load.
+    workers = os.cpu_count() or 1
+    chunksize = max(1, len(params_list) // (workers * 4))
+    results = []
+    try:
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(cargo_options, shm.name)) as pool:
+            for result in pool.imap_unordered(worker, params_list, chunksize=chunksize):
+                results.append(result)
+    finally:
+        shm.close()
+        shm.unlink()
+    results.sort(key=lambda result: result[0])
+    return cargo_options, results
+
+def run_all_scenarios_concurrent():
+    """
+    Runs every scenario and returns the combined ship, cargo and canal logs, the
+    per-scenario ship statistics and the catalog of the simulated cargo options as DataFrames.
+    """
+    import pandas as pd
+    from src.Controller.aggregate import concat_logs, add_derived_ship_columns, ship_statistics
+
+    cargo_options, results = _run_scenarios(run_single_scenario)
+    master_ship_logs = [df_ships for _, df_ships, _, _ in results]
+    master_cargo_logs = [df_cargos for _, _, df_cargos, _ in results]
+    master_canal_logs = [df_canal for _, _, _, df_canal in results]
+
+    final_ships_df, final_cargos_df, final_canal_df = concat_logs(master_ship_logs, master_cargo_logs, master_canal_logs)
+    final_ships_df = add_derived_ship_columns(final_ships_df, BASE_FEE)
+    ship_stats = ship_statistics(final_ships_df)
+
+    return final_ships_df, final_cargos_df, final_canal_df, ship_stats, pd.DataFrame(cargo_catalog(cargo_options))
+
+def simulate_all():
+    """
+    Runs every scenario and writes only the raw per-scenario logs, plus the catalog of
+    the simulated cargo options, to RAW_LOG_DIR without pandas. Combine them afterwards
+    with `python -m src.Controller.aggregate`. Logs left over from an earlier run are
+    removed first, so the aggregate step only sees this run's scenarios.
+    """
+    os.makedirs(RAW_LOG_DIR, exist_ok=True)
+    for path in glob.glob(os.path.join(RAW_LOG_DIR, "scenario_*.json")):
+        os.remove(path)
+    cargo_options, _ = _run_scenarios(simulate_single_scenario)
+    with open(os.path.join(RAW_LOG_DIR, "cargo_catalog.json"), "w") as f:
+        json.dump(cargo_catalog(cargo_options), f)
+
+if __name__ == "__main__" and "--simulate" in sys.argv:
+    # PyPy-friendly driver: `pypy3 -m src.Controller.controller --simulate`
+    start_time = time.perf_counter()
+    simulate_all()
+    print(f"Total simulation execution time: {time.perf_counter() - start_time:.2f} seconds.")
+    print(f"Raw logs have been written to {RAW_LOG_DIR}.")
+
+elif __name__ == "__main__":
+    from src.Controller.aggregate import OUTPUT_FORMAT, write_logs
+
     start_time = time.perf_counter()
-    final_ships_df, final_cargos_df, final_canal_df, ship_stats = run_all_scenarios_concurrent()
+    final_ships_df, final_cargos_df, final_canal_df, ship_stats, cargo_catalog_df = run_all_scenarios_concurrent()
     end_time = time.perf_counter()
     elapsed_time = end_time - start_time
     print(f"Total simulation execution time: {elapsed_time:.2f} seconds.")
 
-    # --- Export CSV Files to the View Folder ---
-    # Determine output directory relative to this file's location (assuming this file is in Controller and View is at ../View)
-    output_dir = os.path.join(os.path.dirname(__file__), "..", "View")
-    os.makedirs(output_dir, exist_ok=True)
-
-    final_ships_df.to_csv(os.path.join(output_dir, "ship_log.csv"), index=False)
-    final_cargos_df.to_csv(os.path.join(output_dir, "cargo_log.csv"), index=False)
-    final_canal_df.to_csv(os.path.join(output_dir, "canal_log.csv"), index=False)
-    ship_stats.to_csv(os.path.join(output_dir, "ship_stats.csv"), index=False)
+    # --- Export the Logs to the View Folder ---
+    write_logs({
+        "ship_log": final_ships_df,
+        "cargo_log": final_cargos_df,
+        "canal_log": final_canal_df,
+        "ship_stats": ship_stats,
+        "cargo_catalog": cargo_catalog_df,
+    }, OUTPUT_DIR)
 
-    print("CSV files have been generated in the View folder.")
+    print(f"{OUTPUT_FORMAT.upper()} files have been generated in the View folder.")
 
 """
 Function to call from main.py to obtain the same result as if this file were executed directly.
 """
 def mainCall():
-    final_ships_df, final_cargos_df, final_canal_df, ship_stats = run_all_scenarios_concurrent()
-
-    output_dir = os.path.join(os.path.dirname(__file__), "..", "View")
-    os.makedirs(output_dir, exist_ok=True)
-    if USE_OPTIMIZATION:
-        final_ships_df.to_csv(os.path.join(output_dir, "ship_log_OPT.csv"), index=False)
-        final_cargos_df.to_csv(os.path.join(output_dir, "cargo_log_OPT.csv"), index=False)
-        final_canal_df.to_csv(os.path.join(output_dir, "canal_log_OPT.csv"), index=False)
-        ship_stats.to_csv(os.path.join(output_dir, "ship_stats_OPT.csv"), index=False)
-    else:
-        final_ships_df.to_csv(os.path.join(output_dir, "ship_log.csv"), index=False)
-        final_cargos_df.to_csv(os.path.join(output_dir, "cargo_log.csv"), index=False)
-        final_canal_df.to_csv(os.path.join(output_dir, "canal_log.csv"), index=False)
-        ship_stats.to_csv(os.path.join(output_dir, "ship_stats.csv"), index=False)
-    print("CSV files have been generated in the View folder.")
+    from src.Controller.aggregate import OUTPUT_FORMAT, write_logs
+
+    final_ships_df, final_cargos_df, final_canal_df, ship_stats, cargo_catalog_df = run_all_scenarios_concurrent()
+
+    suffix = "_OPT" if USE_OPTIMIZATION else ""
+    write_logs({
+        "ship_log": final_ships_df,
+        "cargo_log": final_cargos_df,
+        "canal_log": final_canal_df,
+        "ship_stats": ship_stats,
+    }, OUTPUT_DIR, suffix)
+    # The cargo options do not depend on USE_OPTIMIZATION, so one catalog serves both runs.
+    write_logs({"cargo_catalog": cargo_catalog_df}, OUTPUT_DIR)
+    print(f"{OUTPUT_FORMAT.upper()} files have been generated in the View folder.")
@@ -0,0 +1,34 @@
+"""
+Random generation of the boats and cargo used by the canal simulation.
+"""
+
+import random
+import numpy as np
+
+from src.Model.boat import Boat
+from src.Model.cargo import Cargo
+
+def random_boats(rng, n):
+    """
+    Create n Boats with randomized max_weight and max_space using an exponential distribution,
+    drawing every capacity and name from the NumPy generator in a few vectorized calls.
+    Mean weight capacity is ~10000 units and mean space capacity is ~500 units.
+    """
+    max_weights = np.maximum(1000, rng.exponential(10000, n).astype(np.int64)).tolist()
+    max_spaces = np.maximum(100, rng.exponential(500, n).astype(np.int64)).tolist()
+    numbers = rng.integers(1, 1001, n).tolist()
+    return [Boat("Boat_" + str(number), max_weight, max_space)
+            for number, max_weight, max_space in zip(numbers, max_weights, max_spaces)]
+
+def random_cargo(rng=random):
+    """
+    Create a Cargo with randomized weight, space_required, and value_per_unit using an exponential distribution.
+    Mean weight ~2000 units, mean space ~150 units, mean value ~100.
+    Draws from rng, a random.Random instance (the global random module by default).
+    """
+    weight = max(100, int(rng.expovariate(1 / 2000)))         # ensure non-zero weight
+    space_required = max(50, int(rng.expovariate(1 / 150)))    # ensure non-zero space requirement
+    value_per_unit = max(10, rng.expovariate(1 / 100))         # ensure non-zero value per unit
+    name = "Cargo_" + str(rng.randint(1, 1000))
+    category = rng.choice(["Container", "Bulk", "Liquid", "Refrigerated", "Luxury"])
+    return Cargo(name, value_per_unit, weight, space_required, category)
@@ -0,0 +1,53 @@
+"""
+Numba-compiled knapsack kernel used by cargo_optimizer.
+
+cache=True stores the compiled machine code next to this module, so each new
+process (e.g. every pool worker) loads it instead of recompiling for seconds.
+"""
+import numpy as np
+try:
+    from numba import njit
+except ImportError:
+    # Numba is not available under PyPy, whose own JIT compiles the plain Python loops.
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+
+@njit(cache=True)
+def knapsack_2d(weights, spaces, values, W, S):
+    """
+    Solve the 0/1 knapsack with both a weight and a space constraint by dynamic programming.
+
+    :param weights: int64 array with the weight of each item.
+    :param spaces: int64 array with the space of each item.
+    :param values: float64 array with the value of each item.
+    :param W: Weight capacity.
+    :param S: Space capacity.
+    :return: An int64 array with the indices of the selected items, in ascending order.
+    """
+    n = weights.shape[0]
+    dp = np.zeros((W + 1, S + 1))
+    keep = np.zeros((n, W + 1, S + 1), np.uint8)
+    for i in range(n):
+        wi = weights[i]
+        si = spaces[i]
+        vi = values[i]
+        for w in range(W, wi - 1, -1):
+            for s in range(S, si - 1, -1):
+                candidate = dp[w - wi, s - si] + vi
+                if candidate > dp[w, s]:
+                    dp[w, s] = candidate
+                    keep[i, w, s] = 1
+
+    # Backtrack from the full capacities to recover the chosen items.
+    chosen = np.empty(n, np.int64)
+    count = 0
+    w = W
+    s = S
+    for i in range(n - 1, -1, -1):
+        if keep[i, w, s]:
+            chosen[count] = i
+            count += 1
+            w -= weights[i]
+            s -= spaces[i]
+    return chosen[:count][::-1]
@@ -1,4 +1,7 @@
 class Boat:
+    __slots__ = ("name", "max_weight", "max_space", "current_weight", "current_space",
+                 "total_value", "cargo_list")
+
     def __init__(self, name, max_weight, max_space, total_value=0):
         self.name = name
         self.max_weight = max_weight
@@ -6,27 +9,26 @@ class Boat:
         self.current_weight = 0
         self.current_space = 0
         self.total_value = 0
-        self.cargo_list = []
+        self.cargo_list = []  # references to the shared Cargo objects, not copies
 
     def can_load(self, cargo):
         if self.current_weight + cargo.weight > self.max_weight:
-            print(f"Cannot load {cargo.name}: weight limit exceeded.")
             return False
         if self.current_space + cargo.space_required > self.max_space:
-            print(f"Cannot load {cargo.name}: space limit exceeded.")
             return False
-        self.cargo =+ cargo.value_per_unit
         return True
 
     def load_cargo(self, cargo):
-        if self.can_load(cargo):
-            self.cargo_list.append(cargo)
-            self.current_weight += cargo.weight
-            self.current_space += cargo.space_required
-            self.total_value += cargo.value_per_unit
-            print(f"Cargo '{cargo.name}' loaded successfully.")
-        else:
-            print(f"Failed to load cargo '{cargo.name}'.")
+        """Load the cargo if it fits, checking the limits only once; returns whether it was loaded."""
+        weight = self.current_weight + cargo.weight
+        space = self.current_space + cargo.space_required
+        if weight > self.max_weight or space > self.max_space:
+            return False
+        self.cargo_list.append(cargo)
+        self.current_weight = weight
+        self.current_space = space
+        self.total_value += cargo.value_per_unit * cargo.weight
+        return True
 
     def __repr__(self):
         return (f"Boat({self.name}, Weight Capacity: {self.max_weight}, "
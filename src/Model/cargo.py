@@ -1,4 +1,6 @@
 class Cargo:
+    __slots__ = ("name", "value_per_unit", "weight", "space_required", "category")
+
     def __init__(self, name, value_per_unit, weight, space_required, category):
         self.name = name
         self.value_per_unit = value_per_unit
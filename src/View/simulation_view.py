@@ -4,30 +4,59 @@ pd.set_option('display.width', 1000)
 
 import os
 
+# Repetitive string columns of the logs, loaded as pandas categoricals (integer codes plus
+# one copy of each distinct value) to cut memory and speed up describe().
+CATEGORICAL_COLUMNS = ("Ship", "Cargo", "Category", "Scenario")
+
+
+def log_file(name):
+    """
+    File of the named log: the Parquet file if the simulation wrote one
+    (OUTPUT_FORMAT = "parquet" in the controller's aggregate module), otherwise the CSV file.
+    """
+    parquet_file = name + ".parquet"
+    return parquet_file if os.path.exists(parquet_file) else name + ".csv"
+
+
+def read_log(path):
+    df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
 
 def load_and_describe():
     # Define file names
-    ship_log_file = "ship_log.csv"
-    cargo_log_file = "cargo_log.csv"
-    canal_log_file = "canal_log.csv"
-    ship_stats_file = "ship_stats.csv"
+    ship_log_file = log_file("ship_log")
+    cargo_log_file = log_file("cargo_log")
+    canal_log_file = log_file("canal_log")
+    ship_stats_file = log_file("ship_stats")
+    cargo_catalog_file = log_file("cargo_catalog")
 
-    # Check if CSV files exist
+    # Check if the log files exist (the cargo catalog is optional, see below)
     missing_files = []
     for file in [ship_log_file, cargo_log_file, canal_log_file, ship_stats_file]:
         if not os.path.exists(file):
             missing_files.append(file)
     if missing_files:
-        print("The following CSV files were not found. Please run the simulation first:")
+        print("The following log files were not found. Please run the simulation first:")
         for f in missing_files:
             print("  ", f)
         return
 
-    # Load the CSV files into DataFrames
-    df_ships = pd.read_csv(ship_log_file)
-    df_cargos = pd.read_csv(cargo_log_file)
-    df_canal = pd.read_csv(canal_log_file)
-    ship_stats = pd.read_csv(ship_stats_file)
+    # Load the log files into DataFrames
+    df_ships = read_log(ship_log_file)
+    df_cargos = read_log(cargo_log_file)
+    df_canal = read_log(canal_log_file)
+    ship_stats = read_log(ship_stats_file)
+
+    # The cargo log only holds (Ship, Cargo ID) pairs: join the cargo details from the catalog.
+    # Logs written before the catalog existed carry the cargo details themselves; describe them as-is.
+    if "Cargo ID" in df_cargos.columns and os.path.exists(cargo_catalog_file):
+        df_catalog = read_log(cargo_catalog_file)
+        df_cargos = df_cargos.merge(df_catalog, on="Cargo ID", how="left")
+        df_cargos["Value"] = df_cargos["Value Per Unit"] * df_cargos["Weight"]
 
     # Print descriptive statistics for each DataFrame
     print("Ship Log Description:")
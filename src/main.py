@@ -1,4 +1,4 @@
-import src.Controller.controller
+from src.Controller.controller import mainCall
 
 if __name__ == "__main__":
-    src.Controller.controller.mainCall()
+    mainCall()